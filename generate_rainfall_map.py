@@ -1,10 +1,35 @@
 import geopandas as gpd
 import pandas as pd
+import numpy as np
 import folium
 import matplotlib.pyplot as plt
+from matplotlib.collections import PolyCollection
+from matplotlib.colors import to_rgba_array
 from matplotlib.lines import Line2D
 import json
 import os
+import sys
+from multiprocessing import Process
+from pathlib import Path
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+except ImportError:
+    pa = None
+
+try:
+    import pyogrio
+except ImportError:
+    pyogrio = None
+
+# Candidate column names holding district names in GeoJSON files
+POTENTIAL_DIST_COLS = ['dtname', 'district', 'DISTRICT', 'NAME_2', 'Dist_Name', 'Name', 'objectid', 'censuscode']
 
 # Configuration
 RAINFALL_FILE = 'June_2025_Realized.json'
@@ -12,59 +37,99 @@ GEOJSON_FILE = 'MAHARASHTRA_DISTRICTS.geojson'
 OUTPUT_PNG = 'June_2025_rainfall_map.png'
 OUTPUT_HTML = 'June_2025_rainfall_map.html'
 
+# Rainfall classification (IMD thresholds in mm)
+_CAT_LABELS = ['No Rainfall', 'Moderate Rainfall', 'Heavy Rainfall', 'Very Heavy Rainfall', 'Extremely Heavy Rainfall']
+_COLOR_LUT = {
+    'No Rainfall': '#D3D3D3',              # Light Grey
+    'Moderate Rainfall': '#FFFFE0',        # Light Yellow
+    'Heavy Rainfall': '#FFA500',           # Orange
+    'Very Heavy Rainfall': '#FF0000',      # Red
+    'Extremely Heavy Rainfall': '#8B0000', # Dark Red
+}
+
+# Scalar lookup tables for get_color/get_category - bin edges match the
+# pd.cut call in process_data (right-closed intervals)
+_BINS = np.array([0.0, 64.5, 115.5, 204.4])
+_CATS = tuple(_CAT_LABELS)
+_COLORS = tuple(_COLOR_LUT[c] for c in _CAT_LABELS)
+
+def normalize_names(series):
+    """
+    Strips and uppercases district names. Uses Arrow's utf8 kernels when
+    pyarrow is available (one pass, no intermediate object Series),
+    otherwise falls back to the pandas str chain.
+    """
+    if pa is not None:
+        arr = pa.array(series.astype(str).to_numpy(), type=pa.string())
+        return pc.utf8_upper(pc.utf8_trim_whitespace(arr)).to_pandas()
+    return series.astype(str).str.strip().str.upper()
+
+def load_geojson(path):
+    """
+    Reads a GeoJSON file into a GeoDataFrame. Prefers the pyogrio engine
+    (C++ GDAL-backed, much faster than fiona) and only reads the district
+    name column plus geometry; falls back to plain gpd.read_file.
+    """
+    if pyogrio is not None:
+        try:
+            info = pyogrio.read_info(path)
+            potential_lower = frozenset(p.lower() for p in POTENTIAL_DIST_COLS)
+            wanted = [f for f in info['fields'] if f.lower() in potential_lower]
+            return pyogrio.read_dataframe(path, columns=wanted or None)
+        except Exception as e:
+            print(f"Warning: pyogrio read failed for {path} ({e}). Falling back to geopandas.")
+    return gpd.read_file(path)
+
 def get_color(value):
     """
     Returns color based on rainfall classification.
     """
-    if value == 0:
-        return '#D3D3D3' # Light Grey - No Rainfall
-    elif 0 < value < 64.5:
-        return '#FFFFE0' # Light Yellow - Moderate
-    elif 64.5 <= value <= 115.5:
-        return '#FFA500' # Orange - Heavy
-    elif 115.5 < value <= 204.4:
-        return '#FF0000' # Red - Very Heavy
-    elif value > 204.4:
-        return '#8B0000' # Dark Red - Extremely Heavy
-    else:
-        return '#D3D3D3' # Default/Error
+    if value <= 0:
+        return _COLORS[0] # Light Grey - No Rainfall
+    if value == 64.5:
+        return _COLORS[2] # Orange - Heavy (64.5-115.5 mm inclusive)
+    return _COLORS[int(_BINS.searchsorted(value, side='left'))]
 
 def get_category(value):
-    if value == 0:
-        return "No Rainfall"
-    elif 0 < value < 64.5:
-        return "Moderate Rainfall"
-    elif 64.5 <= value <= 115.5:
-        return "Heavy Rainfall"
-    elif 115.5 < value <= 204.4:
-        return "Very Heavy Rainfall"
-    elif value > 204.4:
-        return "Extremely Heavy Rainfall"
-    else:
-        return "No Data"
+    if value <= 0:
+        return _CATS[0]
+    if value == 64.5:
+        return _CATS[2]
+    return _CATS[int(_BINS.searchsorted(value, side='left'))]
 
 def process_data():
     print("Step 1: Processing Rainfall Data...")
-    # Load Rainfall Data
+    # Load Rainfall Data (orjson parses ~2-3x faster than stdlib json)
     try:
-        with open(RAINFALL_FILE, 'r') as f:
-            data = json.load(f)
+        with open(RAINFALL_FILE, 'rb') as f:
+            if orjson is not None:
+                data = orjson.loads(f.read())
+            else:
+                data = json.load(f)
     except Exception as e:
         print(f"Error loading {RAINFALL_FILE}: {e}")
         return None, None
 
-    df = pd.DataFrame(data)
-    
     # Check if R/F column exists, otherwise look for alternatives
-    if 'R/F' not in df.columns:
+    if not data or 'R/F' not in data[0]:
         print("Error: 'R/F' column not found in rainfall data.")
         return None, None
 
-    # Convert R/F to numeric, coerce errors to NaN then fill with 0
-    df['R/F'] = pd.to_numeric(df['R/F'], errors='coerce').fillna(0)
+    # Extract DISTRICT and R/F in one pass into a typed array - skips the
+    # object-dtype frame plus pd.to_numeric(errors='coerce').fillna(0) scans
+    n = len(data)
+    rf = np.empty(n, dtype='float32')
+    districts = [None] * n
+    for i, rec in enumerate(data):
+        try:
+            rf[i] = float(rec.get('R/F', 0) or 0)
+        except (TypeError, ValueError):
+            rf[i] = 0.0
+        districts[i] = rec.get('DISTRICT')
+    df = pd.DataFrame({'DISTRICT': districts, 'R/F': rf})
     
     # Normalize DISTRICT names
-    df['DISTRICT'] = df['DISTRICT'].astype(str).str.strip().str.upper()
+    df['DISTRICT'] = normalize_names(df['DISTRICT'])
     
     # Configuration
     GOA_FILE = 'GOA_DISTRICTS.geojson'
@@ -80,28 +145,33 @@ def process_data():
         'BEED': 'BID',
     }
     
-    df['DISTRICT'] = df['DISTRICT'].replace(name_mapping)
-
-    # SPECIAL HANDLING FOR MUMBAI
-    if 'MUMBAI' in df['DISTRICT'].values:
-        mumbai_row = df[df['DISTRICT'] == 'MUMBAI'].copy()
-        if not mumbai_row.empty:
-            mumbai_suburban = mumbai_row.copy()
-            mumbai_suburban['DISTRICT'] = 'MUMBAI SUBURBAN'
-            df = pd.concat([df, mumbai_suburban], ignore_index=True)
-            print("Info: Duplicated 'MUMBAI' data to 'MUMBAI SUBURBAN' for map coverage.")
+    # .map + where is a single O(N) hash lookup pass; .replace loops over
+    # the mapping keys internally and can fall into its regex machinery
+    mapped = df['DISTRICT'].map(name_mapping)
+    df['DISTRICT'] = mapped.where(mapped.notna(), df['DISTRICT'])
 
     # Aggregate by District (Mean)
-    rain_agg = df.groupby('DISTRICT')['R/F'].mean().reset_index()
+    # observed=True/sort=False keeps the groupby on the cheap hash path
+    rain_agg = df.groupby('DISTRICT', observed=True, sort=False)['R/F'].mean().reset_index()
     rain_agg.rename(columns={'R/F': 'RAINFALL_MM'}, inplace=True)
     rain_agg['RAINFALL_MM'] = rain_agg['RAINFALL_MM'].round(1)
+
+    # SPECIAL HANDLING FOR MUMBAI
+    # Duplicate the already-aggregated value instead of concatenating raw rows
+    # into df before the groupby
+    mumbai_mask = rain_agg['DISTRICT'].eq('MUMBAI')
+    if mumbai_mask.any():
+        mumbai_value = rain_agg.loc[mumbai_mask, 'RAINFALL_MM'].iloc[0]
+        suburban_row = pd.DataFrame({'DISTRICT': ['MUMBAI SUBURBAN'], 'RAINFALL_MM': [mumbai_value]})
+        rain_agg = pd.concat([rain_agg, suburban_row], ignore_index=True)
+        print("Info: Duplicated 'MUMBAI' data to 'MUMBAI SUBURBAN' for map coverage.")
     
     print(f"Loaded {len(rain_agg)} districts from rainfall data.")
 
     print("Step 2: Processing GeoJSON Data...")
     # Load Main GeoJSON
     try:
-        gdf = gpd.read_file(GEOJSON_FILE)
+        gdf = load_geojson(GEOJSON_FILE)
     except Exception as e:
         print(f"Error loading {GEOJSON_FILE}: {e}")
         return None, None
@@ -111,7 +181,7 @@ def process_data():
     if os.path.exists(GOA_FILE):
         try:
             print(f"Loading {GOA_FILE}...")
-            goa_gdf = gpd.read_file(GOA_FILE)
+            goa_gdf = load_geojson(GOA_FILE)
         except Exception as e:
             print(f"Error loading {GOA_FILE}: {e}")
     else:
@@ -119,9 +189,9 @@ def process_data():
 
     # Function to find district column
     def find_district_col(geo_df):
-        potential_cols = ['dtname', 'district', 'DISTRICT', 'NAME_2', 'Dist_Name', 'Name', 'objectid', 'censuscode']
+        potential_lower = frozenset(p.lower() for p in POTENTIAL_DIST_COLS)
         for col in geo_df.columns:
-            if col.lower() in [p.lower() for p in potential_cols]:
+            if col.lower() in potential_lower:
                 if pd.api.types.is_string_dtype(geo_df[col]) or pd.api.types.is_object_dtype(geo_df[col]):
                     return col
         return None
@@ -134,14 +204,14 @@ def process_data():
     print(f"Using GeoJSON column '{dist_col}' for district names in Maharashtra.")
     
     # Normalize Main GeoJSON
-    gdf['DISTRICT_NORM'] = gdf[dist_col].astype(str).str.strip().str.upper()
+    gdf['DISTRICT_NORM'] = normalize_names(gdf[dist_col])
 
     # Process and Merge Goa
     if goa_gdf is not None:
         goa_dist_col = find_district_col(goa_gdf)
         if goa_dist_col:
             print(f"Using GeoJSON column '{goa_dist_col}' for district names in Goa.")
-            goa_gdf['DISTRICT_NORM'] = goa_gdf[goa_dist_col].astype(str).str.strip().str.upper()
+            goa_gdf['DISTRICT_NORM'] = normalize_names(goa_gdf[goa_dist_col])
             
             # Map Goa Districts to match Rainfall Data
             # Rainfall Data has 'GOA' and 'SOUTH GOA'
@@ -149,14 +219,18 @@ def process_data():
             # Mapping 'NORTH GOA' -> 'GOA' to pick up the generic 'GOA' data
             # 'SOUTH GOA' -> 'SOUTH GOA' (no change needed if matches)
             
-            # Use replace with a dict for specific mappings
+            # Use map with a dict for specific mappings
             goa_mapping = {
                 'NORTH GOA': 'GOA'
             }
-            goa_gdf['DISTRICT_NORM'] = goa_gdf['DISTRICT_NORM'].replace(goa_mapping)
+            goa_mapped = goa_gdf['DISTRICT_NORM'].map(goa_mapping)
+            goa_gdf['DISTRICT_NORM'] = goa_mapped.where(goa_mapped.notna(), goa_gdf['DISTRICT_NORM'])
             
             # Ensure CRS matches before concatenation
-            if gdf.crs != goa_gdf.crs:
+            # Use crs.equals instead of != so numerically identical CRSes
+            # (e.g. differing only in axis order) skip the PROJ reprojection
+            if gdf.crs is None or goa_gdf.crs is None or not gdf.crs.equals(goa_gdf.crs):
+                print("Info: Reprojecting Goa GeoJSON to match Maharashtra CRS.")
                 goa_gdf = goa_gdf.to_crs(gdf.crs)
             
             # Concatenate
@@ -165,34 +239,52 @@ def process_data():
         else:
             print("Error: Could not identify District Name column in Goa GeoJSON.")
 
-    # Debug matching
-    json_districts = set(rain_agg['DISTRICT'])
-    geojson_districts = set(gdf['DISTRICT_NORM'])
-    
-    unmatched_json = json_districts - geojson_districts
-    missing_data_map = geojson_districts - json_districts
-    
+    # Debug matching - isin stays in C instead of building two Python sets
+    unmatched_json = rain_agg.loc[~rain_agg['DISTRICT'].isin(gdf['DISTRICT_NORM']), 'DISTRICT'].tolist()
+    missing_data_map = gdf.loc[~gdf['DISTRICT_NORM'].isin(rain_agg['DISTRICT']), 'DISTRICT_NORM'].unique().tolist()
+
     print("\n--- Matching Report ---")
     if unmatched_json:
-        print(f"Districts in JSON but NOT in GeoJSON ({len(unmatched_json)}): {sorted(list(unmatched_json))}")
+        print(f"Districts in JSON but NOT in GeoJSON ({len(unmatched_json)}): {sorted(unmatched_json)}")
     else:
         print("All JSON districts matched with GeoJSON.")
-        
+
     if missing_data_map:
-        print(f"Districts in GeoJSON with no data in JSON ({len(missing_data_map)}): {sorted(list(missing_data_map))}")
+        print(f"Districts in GeoJSON with no data in JSON ({len(missing_data_map)}): {sorted(missing_data_map)}")
     print("-----------------------\n")
 
     print("Step 3: Merging Data...")
-    # Merge
-    merged = gdf.merge(rain_agg, left_on='DISTRICT_NORM', right_on='DISTRICT', how='left')
-    
-    # Fill missing with 0
-    merged['RAINFALL_MM'] = merged['RAINFALL_MM'].fillna(0)
-    merged['CATEGORY'] = merged['RAINFALL_MM'].apply(get_category)
-    merged['COLOR'] = merged['RAINFALL_MM'].apply(get_color)
+    # Map rainfall values onto the districts directly - for an N-to-1 join
+    # with ~36 keys a dict lookup beats building merge hash tables and a
+    # duplicated-column frame. Missing districts get 0.
+    rain_map = dict(zip(rain_agg['DISTRICT'].to_numpy(), rain_agg['RAINFALL_MM'].to_numpy()))
+    merged = gdf.copy()
+    merged['RAINFALL_MM'] = merged['DISTRICT_NORM'].map(rain_map).fillna(0.0).astype('float32')
+
+    # Classify all districts in one vectorized pass instead of per-row apply
+    merged['CATEGORY'] = pd.cut(
+        merged['RAINFALL_MM'],
+        bins=[-np.inf, 0.0, 64.5, 115.5, 204.4, np.inf],
+        labels=_CAT_LABELS,
+        right=True,
+        include_lowest=True
+    )
+    # Exact zero means "No Rainfall" regardless of binning edge behaviour,
+    # and exactly 64.5 belongs to "Heavy" (64.5-115.5 mm) per the legend -
+    # the right-closed bins would otherwise put it in "Moderate"
+    merged.loc[merged['RAINFALL_MM'] == 0, 'CATEGORY'] = 'No Rainfall'
+    merged.loc[merged['RAINFALL_MM'].eq(64.5), 'CATEGORY'] = 'Heavy Rainfall'
+    # Keep CATEGORY (already Categorical from pd.cut) and COLOR as category
+    # dtype - 5 distinct labels stored as int8 codes instead of one Python
+    # string per row, which also serializes faster for the folium HTML
+    merged['COLOR'] = merged['CATEGORY'].map(_COLOR_LUT).astype('category')
     
     # Create a formatted column for tooltip with " mm"
-    merged['RAINFALL_DISPLAY'] = merged['RAINFALL_MM'].astype(str) + " mm"
+    # np.char.add concatenates in one vectorized pass instead of per-element
+    # str() plus Python-level +; store arrow-backed when pyarrow is around
+    vals = np.round(merged['RAINFALL_MM'].to_numpy(dtype='float32'), 1).astype('U8')
+    display_dtype = 'string[pyarrow]' if pa is not None else 'string'
+    merged['RAINFALL_DISPLAY'] = pd.array(np.char.add(vals, ' mm'), dtype=display_dtype)
     
     print(f"Merged entries: {len(merged)}")
     return merged, dist_col
@@ -202,7 +294,20 @@ def create_static_map(gdf):
     fig, ax = plt.subplots(1, 1, figsize=(15, 12)) # Larger figure for clarity
     
     # Plot districts with color
-    gdf.plot(column='RAINFALL_MM', ax=ax, color=gdf['COLOR'], edgecolor='black', linewidth=0.8)
+    # Build one PolyCollection instead of letting gdf.plot create a patch per
+    # polygon - colors are already precomputed so matplotlib just draws once
+    exploded = gdf.explode(index_parts=False).reset_index(drop=True)
+    polys = [np.asarray(geom.exterior.coords) for geom in exploded.geometry]
+    face_colors = to_rgba_array(exploded['COLOR'].to_numpy())
+    pc = PolyCollection(polys, facecolors=face_colors, edgecolors='black', linewidths=0.8)
+
+    # Fix the extent from total_bounds up front so matplotlib never has to
+    # autoscale over every polygon bbox
+    minx, miny, maxx, maxy = gdf.total_bounds
+    ax.set_aspect('equal')
+    ax.set_xlim(minx, maxx)
+    ax.set_ylim(miny, maxy)
+    ax.add_collection(pc, autolim=False)
     
     # Add labels for districts (centroids)
     # Using apply with a lambda to get representative point for text
@@ -224,13 +329,16 @@ def create_static_map(gdf):
     ax.set_title("Maharashtra District-wise Rainfall Classification", fontsize=20, pad=20)
     ax.set_axis_off()
     
-    plt.savefig(OUTPUT_PNG, dpi=300, bbox_inches='tight')
+    # Save sequentially - concurrent savefig calls on one figure are not
+    # thread-safe (the tight-bbox probe patches figure.draw and the other
+    # thread's draw hits its internal Done sentinel)
+    fig.savefig(OUTPUT_PNG, dpi=300, bbox_inches='tight')
     print(f"Saved {OUTPUT_PNG}")
-    
+
     OUTPUT_SVG = 'June_2025_rainfall_map.svg'
-    plt.savefig(OUTPUT_SVG, format='svg', bbox_inches='tight')
+    fig.savefig(OUTPUT_SVG, format='svg', bbox_inches='tight')
     print(f"Saved {OUTPUT_SVG}")
-    plt.close()
+    plt.close(fig)
 
 def create_interactive_map(gdf, dist_col_name):
     print("Step 5: Generating Interactive Map (HTML)...")
@@ -238,28 +346,40 @@ def create_interactive_map(gdf, dist_col_name):
     # Centroid of Maharashtra roughly
     m = folium.Map(location=[19.7515, 75.7139], zoom_start=7, tiles='CartoDB positron')
     
-    # Style function
+    # Style function - COLOR is precomputed in process_data, so just read it
     def style_function(feature):
-        rainfall = feature['properties'].get('RAINFALL_MM', 0)
         return {
-            'fillColor': get_color(rainfall),
+            'fillColor': feature['properties']['COLOR'],
             'color': 'black',
             'weight': 1,
             'fillOpacity': 0.7
         }
-    
+
     # Highlight function
     def highlight_function(feature):
         return {
-            'fillColor': get_color(feature['properties'].get('RAINFALL_MM',0)),
+            'fillColor': feature['properties']['COLOR'],
             'color': 'black',
             'weight': 3,
             'fillOpacity': 0.9
         }
 
+    # Simplify geometries for the web map - full resolution is overkill at zoom 7
+    # (~0.005 deg tolerance is roughly 500m) and bloats the HTML output
+    gdf_simple = gdf.copy()
+    gdf_simple['geometry'] = gdf_simple.geometry.simplify(tolerance=0.005, preserve_topology=True)
+
+    # Keep only the columns the map needs to shrink the serialized GeoJSON
+    slim_gdf = gdf_simple[[dist_col_name, 'RAINFALL_DISPLAY', 'CATEGORY', 'COLOR', 'geometry']]
+
+    # Serialize once via geopandas' C-level writer - handing folium the
+    # GeoDataFrame would walk __geo_interface__ building a Python dict per
+    # feature and per vertex
+    geojson_str = slim_gdf.to_json()
+
     # Add features
     folium.GeoJson(
-        gdf,
+        geojson_str,
         style_function=style_function,
         highlight_function=highlight_function,
         tooltip=folium.GeoJsonTooltip(
@@ -284,20 +404,34 @@ def create_interactive_map(gdf, dist_col_name):
      <i style="background:#8B0000;opacity:0.7;width:18px;height:18px;display:inline-block;margin-right:8px;border:1px solid #ccc;"></i> Extr. Heavy (&gt; 204.4)<br>
      </div>
      '''
-    m.get_root().html.add_child(folium.Element(legend_html))
-    
-    # Add Title Overlay (Optional but nice)
+
+    # Title Overlay (Optional but nice)
     title_html = '''
      <h3 align="center" style="font-size:20px"><b>Maharashtra District-wise Rainfall Classification</b></h3>
      '''
-    m.get_root().html.add_child(folium.Element(title_html))
 
-    m.save(OUTPUT_HTML)
+    # Render the Jinja template tree once and splice the static legend/title
+    # HTML into the output, instead of mutating the element tree via
+    # add_child (which re-renders the whole template graph per child)
+    html_out = m.get_root().render()
+    html_out = html_out.replace('<body>', f'<body>{title_html}{legend_html}', 1)
+    Path(OUTPUT_HTML).write_text(html_out, encoding='utf-8')
     print(f"Saved {OUTPUT_HTML}")
 
 if __name__ == "__main__":
     merged_gdf, district_col_name = process_data()
     if merged_gdf is not None:
-        create_static_map(merged_gdf)
-        create_interactive_map(merged_gdf, district_col_name)
+        # The two maps are independent and both CPU-bound (AGG rasterization
+        # vs folium serialization), so render them in parallel processes
+        p_static = Process(target=create_static_map, args=(merged_gdf,))
+        p_interactive = Process(target=create_interactive_map, args=(merged_gdf, district_col_name))
+        p_static.start()
+        p_interactive.start()
+        p_static.join()
+        p_interactive.join()
+        # join() swallows child failures - propagate them so a broken
+        # render exits nonzero like the old sequential calls did
+        if p_static.exitcode != 0 or p_interactive.exitcode != 0:
+            print(f"Error: map generation failed (static exitcode={p_static.exitcode}, interactive exitcode={p_interactive.exitcode}).")
+            sys.exit(1)
         print("Done.")